@@ -0,0 +1,270 @@
+import json
+import math
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+# Gemini daily quotas reset at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+DEFAULT_STATE_FILE = 'analysis_queue_state.json'
+
+# Posts that failed this many times are pushed to the back of the queue
+MAX_FAILURES_BEFORE_DEPRIORITIZE = 2
+
+
+class DailyQuotaExhausted(Exception):
+    """Raised when today's request budget is spent, locally or according to the API."""
+
+
+class RateLimitExhausted(Exception):
+    """Raised when per-minute 429s outlast the retries; a project-wide condition, not a post failure."""
+
+
+def has_analysis(post):
+    """
+    Return True if the post has a real gemini_analysis. Error stubs written by older
+    versions of analyze_posts.py (performance.accuracy == 'Error') don't count.
+    """
+    analysis = post.get('gemini_analysis')
+    if not analysis:
+        return False
+    if isinstance(analysis, dict) and (analysis.get('performance') or {}).get('accuracy') == 'Error':
+        return False
+    return True
+
+
+def _to_int(value, default=0):
+    """Ed exports numbers as strings ('95', 'None'); coerce them safely."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def cell_key(post):
+    """
+    Return the (llm, homework_number) cell a post belongs to in model_analysis.json,
+    or None if the homework number is unknown.
+    """
+    hw = _to_int(post.get('homework_number'), -1)
+    if hw < 0:
+        return None
+    return (post.get('llm', 'Unknown'), hw)
+
+
+def engagement_score(post):
+    """Rank posts by the engagement signals already in the Ed export."""
+    return (_to_int(post.get('vote_count')), _to_int(post.get('view_count')))
+
+
+def build_priority_queue(posts, failures=None, saved_order=None):
+    """
+    Order the unanalyzed posts to maximize coverage of (llm, homework_number) cells.
+
+    1. The most engaged post of every cell that has no analyzed post yet,
+       with cells ordered by that post's engagement.
+    2. Everything else, by engagement.
+    If saved_order (post ids from a previous run) is given, posts keep that relative order
+    within each group and new posts follow them by engagement; analyzed posts drop out.
+    Posts that keep failing are set aside before cells are picked, so the next post in
+    their cell takes over its coverage slot, and are appended behind all others.
+    """
+    failures = failures or {}
+    covered = {cell_key(p) for p in posts if has_analysis(p)}
+    pending = [p for p in posts if not has_analysis(p)]
+    pending.sort(key=engagement_score, reverse=True)
+    if saved_order:
+        # Stable sort: posts not seen last run keep their engagement order behind saved ones
+        saved_rank = {post_id: rank for rank, post_id in enumerate(saved_order)}
+        pending.sort(key=lambda p: saved_rank.get(str(p.get('id')), len(saved_rank)))
+
+    failing = [p for p in pending if failures.get(str(p.get('id')), 0) >= MAX_FAILURES_BEFORE_DEPRIORITIZE]
+    pending = [p for p in pending if failures.get(str(p.get('id')), 0) < MAX_FAILURES_BEFORE_DEPRIORITIZE]
+
+    first_pass = []
+    rest = []
+    seen_cells = set()
+    for post in pending:
+        cell = cell_key(post)
+        if cell is not None and cell not in covered and cell not in seen_cells:
+            seen_cells.add(cell)
+            first_pass.append(post)
+        else:
+            rest.append(post)
+
+    return first_pass + rest + failing
+
+
+def uncovered_cells(posts):
+    """Return the cells that have posts but no analyzed post."""
+    cells = defaultdict(bool)
+    for post in posts:
+        cell = cell_key(post)
+        if cell is not None:
+            cells[cell] = cells[cell] or has_analysis(post)
+    return sorted(cell for cell, covered in cells.items() if not covered)
+
+
+class AnalysisScheduler:
+    """
+    Tracks the Gemini request budget (per minute and per day) and the analysis queue,
+    persisting both to a JSON state file so quota usage and failures survive restarts.
+    """
+
+    def __init__(self, max_per_minute, max_per_day, min_delay=0, state_file=DEFAULT_STATE_FILE):
+        self.max_per_minute = max_per_minute
+        self.max_per_day = max_per_day
+        self.min_delay = min_delay
+        self.state_file = state_file
+        self.request_times = []
+        self.state = {
+            'quota_day': None,
+            'requests_today': 0,
+            'failures': {},
+            'queue': [],
+        }
+        self._load_state()
+        self._roll_quota_day()
+
+    def _load_state(self):
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                loaded = json.load(f)
+            if not isinstance(loaded, dict):
+                raise ValueError(f"expected a JSON object, got {type(loaded).__name__}")
+        except (OSError, ValueError) as e:
+            # json.JSONDecodeError is a ValueError subclass
+            print(f"  ⚠ Could not read scheduler state from {self.state_file}: {e}. Starting fresh.")
+            return
+        self.state.update(loaded)
+
+    def save_state(self):
+        with open(self.state_file, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+
+    def _now(self):
+        return datetime.now(QUOTA_TIMEZONE)
+
+    def _roll_quota_day(self):
+        """Reset the daily counter when the quota day has changed."""
+        today = self._now().date().isoformat()
+        if self.state['quota_day'] != today:
+            self.state['quota_day'] = today
+            self.state['requests_today'] = 0
+
+    def plan(self, posts):
+        """
+        Build (and persist) the prioritized queue of posts to analyze, restoring the order
+        saved by the previous run and merging in posts that are new since then.
+        """
+        queue = build_priority_queue(posts, self.state['failures'], self.state['queue'])
+        self.state['queue'] = [str(p.get('id')) for p in queue]
+        self.save_state()
+        return queue
+
+    def requests_left_today(self):
+        self._roll_quota_day()
+        return max(0, self.max_per_day - self.state['requests_today'])
+
+    def acquire(self):
+        """
+        Block until a request may be sent under the per-minute budget and record it.
+        Returns False without waiting if the daily budget is exhausted.
+        """
+        if self.requests_left_today() <= 0:
+            return False
+
+        now = time.monotonic()
+        self.request_times = [t for t in self.request_times if now - t < 60]
+        wait_seconds = 0
+        if self.request_times:
+            wait_seconds = self.min_delay - (now - self.request_times[-1])
+        if len(self.request_times) >= self.max_per_minute:
+            wait_seconds = max(wait_seconds, 60 - (now - self.request_times[0]) + 1)
+            print(f"  ⏳ Rate limit: {len(self.request_times)} requests in last minute. Waiting {wait_seconds:.1f} seconds...")
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+            now = time.monotonic()
+            self.request_times = [t for t in self.request_times if now - t < 60]
+
+        self.request_times.append(now)
+        self.state['requests_today'] += 1
+        self.save_state()
+        return True
+
+    def mark_exhausted(self):
+        """Record that the API reported the daily quota as used up."""
+        self.state['requests_today'] = max(self.state['requests_today'], self.max_per_day)
+        self.save_state()
+
+    def record_result(self, post, succeeded):
+        post_id = str(post.get('id'))
+        if succeeded:
+            self.state['failures'].pop(post_id, None)
+            if post_id in self.state['queue']:
+                self.state['queue'].remove(post_id)
+        else:
+            self.state['failures'][post_id] = self.state['failures'].get(post_id, 0) + 1
+        self.save_state()
+
+    def projected_duration(self, num_requests):
+        """Estimate wall-clock time to send num_requests under both budgets."""
+        if num_requests <= 0:
+            return timedelta(0)
+
+        per_minute = self.max_per_minute
+        if self.min_delay > 0:
+            per_minute = min(per_minute, 60 / self.min_delay)
+        seconds_per_request = 60 / per_minute
+
+        left_today = self.requests_left_today()
+        if num_requests <= left_today:
+            return timedelta(seconds=num_requests * seconds_per_request)
+
+        now = self._now()
+        next_reset = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=QUOTA_TIMEZONE)
+        remaining = num_requests - left_today
+        full_days = math.ceil(remaining / self.max_per_day) - 1
+        last_day_requests = remaining - full_days * self.max_per_day
+        return (next_reset - now) + timedelta(days=full_days, seconds=last_day_requests * seconds_per_request)
+
+    def requests_until_covered(self, posts):
+        """
+        Number of queued posts that must be processed before every uncovered cell has had
+        its first post analyzed, i.e. the queue position of the last cell to be reached.
+        Cells whose only pending posts are failing ones sit at the back of the queue.
+        """
+        remaining = set(uncovered_cells(posts))
+        queue = build_priority_queue(posts, self.state['failures'], self.state['queue'])
+        for position, post in enumerate(queue, start=1):
+            remaining.discard(cell_key(post))
+            if not remaining:
+                return position
+        return len(queue)
+
+    def report(self, posts):
+        """Print the projected time until every cell and every post is analyzed."""
+        cells = uncovered_cells(posts)
+        pending = sum(1 for p in posts if not has_analysis(p))
+        until_covered = self.requests_until_covered(posts) if cells else 0
+        print(f"Uncovered (LLM, HW) cells: {len(cells)}")
+        print(f"Requests left today: {self.requests_left_today()}/{self.max_per_day}")
+        print(f"Projected time until every cell is covered ({until_covered} requests): {_format_duration(self.projected_duration(until_covered))}")
+        print(f"Projected time until all {pending} pending posts are analyzed: {_format_duration(self.projected_duration(pending))}")
+
+
+def _format_duration(delta):
+    if delta.total_seconds() < 60:
+        return f"{int(delta.total_seconds())}s"
+    total_minutes = int(delta.total_seconds() // 60)
+    days, rem = divmod(total_minutes, 60 * 24)
+    hours, minutes = divmod(rem, 60)
+    if days:
+        return f"{days}d {hours}h {minutes}m"
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m"
@@ -4,7 +4,7 @@ import time
 import re
 import google.generativeai as genai
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
+from analysis_scheduler import AnalysisScheduler, DailyQuotaExhausted, RateLimitExhausted
 
 # Load environment variables
 load_dotenv()
@@ -20,6 +20,8 @@ genai.configure(api_key=GEMINI_API_KEY)
 # Using 7 seconds to be safe with buffer
 MIN_DELAY_BETWEEN_REQUESTS = 7  # seconds
 MAX_REQUESTS_PER_MINUTE = 10
+# Free-tier daily quota; override with GEMINI_MAX_REQUESTS_PER_DAY if your project has a different one
+MAX_REQUESTS_PER_DAY = int(os.getenv('GEMINI_MAX_REQUESTS_PER_DAY', '1000'))
 
 def extract_retry_delay(error_message):
     """Extract retry delay from error message if available."""
@@ -36,10 +38,12 @@ def extract_retry_delay(error_message):
     return None
 
 
-def analyze_post(post, max_retries=3):
+def analyze_post(post, scheduler=None, max_retries=3):
     """
     Analyze a single post using Gemini API with retry logic.
     Returns a structured analysis in JSON format.
+    If a scheduler is given, every attempt (retries included) is charged to its request budget;
+    raises DailyQuotaExhausted once the daily budget is spent.
     """
     title = post.get('title', '')
     content = post.get('document', '') or post.get('content', '')
@@ -102,6 +106,10 @@ Be thorough, specific, and objective. Reference specific examples from the post
     
     # Retry logic for rate limits
     for attempt in range(max_retries):
+        # Waits out the per-minute budget; returns False once today's budget is spent
+        if scheduler is not None and not scheduler.acquire():
+            raise DailyQuotaExhausted(f"Daily request budget ({scheduler.max_per_day}) used up")
+        
         try:
             response = model.generate_content(prompt)
             
@@ -139,6 +147,14 @@ Be thorough, specific, and objective. Reference specific examples from the post
             
             # Check if it's a rate limit error (429)
             if '429' in error_str or 'quota' in error_str.lower() or 'rate limit' in error_str.lower():
+                # Per-day quota violations (e.g. "...RequestsPerDay...") won't clear by waiting
+                if 'PerDay' in error_str:
+                    raise DailyQuotaExhausted(error_str)
+                
+                if attempt == max_retries - 1:
+                    print(f"  ✗ Max retries reached for post {post.get('id')}")
+                    raise RateLimitExhausted(error_str) from e
+                
                 retry_delay = extract_retry_delay(error_str)
                 
                 if retry_delay:
@@ -151,27 +167,12 @@ Be thorough, specific, and objective. Reference specific examples from the post
                     print(f"  ⚠ Rate limit hit. Waiting {wait_time} seconds before retry...")
                     time.sleep(wait_time)
                 
-                if attempt < max_retries - 1:
-                    print(f"  ↻ Retrying (attempt {attempt + 2}/{max_retries})...")
-                    continue
-                else:
-                    print(f"  ✗ Max retries reached for post {post.get('id')}")
-                    raise
+                print(f"  ↻ Retrying (attempt {attempt + 2}/{max_retries})...")
+                continue
             
-            # For other errors, don't retry
-            print(f"Error analyzing post {post.get('id')}: {error_str}")
-            return {
-                "summary": f"Error during analysis: {error_str}",
-                "performance": {
-                    "accuracy": "Error",
-                    "one_shot_capability": "Error",
-                    "reasoning_quality": "Error"
-                },
-                "strengths": [],
-                "weaknesses": [],
-                "notable_behaviors": [],
-                "detailed_analysis": f"Failed to analyze: {error_str}"
-            }
+            # For other errors (safety blocks, empty responses, 5xx), don't retry. Raising
+            # instead of saving a stub keeps the post pending and counts it as a failure.
+            raise
     
     # Should not reach here, but just in case
     raise Exception("Failed to analyze post after all retries")
@@ -188,27 +189,25 @@ def main():
     
     print(f"Found {len(posts)} posts to analyze.")
     
-    # Check which posts already have analysis
-    posts_to_analyze = []
-    posts_already_analyzed = 0
+    scheduler = AnalysisScheduler(
+        max_per_minute=MAX_REQUESTS_PER_MINUTE,
+        max_per_day=MAX_REQUESTS_PER_DAY,
+        min_delay=MIN_DELAY_BETWEEN_REQUESTS,
+    )
     
-    for post in posts:
-        if 'gemini_analysis' not in post or not post.get('gemini_analysis'):
-            posts_to_analyze.append(post)
-        else:
-            posts_already_analyzed += 1
+    # Order pending posts so every (LLM, HW) cell gets one analysis before any gets a second
+    posts_to_analyze = scheduler.plan(posts)
+    posts_already_analyzed = len(posts) - len(posts_to_analyze)
     
     print(f"Posts already analyzed: {posts_already_analyzed}")
     print(f"Posts to analyze: {len(posts_to_analyze)}")
+    scheduler.report(posts)
     
     if not posts_to_analyze:
         print("All posts already have analysis. Exiting.")
         return
     
-    # Track request timestamps for rate limiting
-    request_times = []
-    
-    # Analyze each post
+    # Analyze each post in priority order
     for idx, post in enumerate(posts_to_analyze):
         post_id = post.get('id', 'unknown')
         llm = post.get('llm', 'Unknown')
@@ -216,30 +215,10 @@ def main():
         
         print(f"\n[{idx + 1}/{len(posts_to_analyze)}] Analyzing post {post_id} (LLM: {llm}, HW: {hw})...")
         
-        # Rate limiting: ensure we don't exceed 10 requests per minute
-        current_time = datetime.now()
-        
-        # Remove timestamps older than 1 minute
-        request_times = [t for t in request_times if current_time - t < timedelta(minutes=1)]
-        
-        # If we've made 10 requests in the last minute, wait
-        if len(request_times) >= MAX_REQUESTS_PER_MINUTE:
-            oldest_request = min(request_times)
-            wait_until = oldest_request + timedelta(minutes=1)
-            wait_seconds = (wait_until - current_time).total_seconds() + 1  # Add 1 second buffer
-            if wait_seconds > 0:
-                print(f"  ⏳ Rate limit: {len(request_times)} requests in last minute. Waiting {wait_seconds:.1f} seconds...")
-                time.sleep(wait_seconds)
-                # Update current_time after waiting
-                current_time = datetime.now()
-                request_times = [t for t in request_times if current_time - t < timedelta(minutes=1)]
-        
-        # Record this request
-        request_times.append(current_time)
-        
         try:
-            analysis = analyze_post(post)
+            analysis = analyze_post(post, scheduler)
             post['gemini_analysis'] = analysis
+            scheduler.record_result(post, succeeded=True)
             
             # Save progress after each post
             with open(output_file, 'w', encoding='utf-8') as f:
@@ -247,15 +226,24 @@ def main():
             
             print(f"✓ Analysis complete for post {post_id}")
             
+        except DailyQuotaExhausted as e:
+            scheduler.mark_exhausted()
+            print(f"\n⏸ Daily quota exhausted ({e}). Re-run tomorrow to continue.")
+            scheduler.report(posts)
+            return
+        
+        except RateLimitExhausted:
+            # Not this post's fault: leave it at its place in the queue and stop for now
+            print("\n⏸ Still rate limited after all retries. Re-run later to continue.")
+            scheduler.report(posts)
+            return
+        
         except Exception as e:
             print(f"✗ Failed to analyze post {post_id}: {str(e)}")
+            scheduler.record_result(post, succeeded=False)
             # Still save progress even if this one failed
             with open(output_file, 'w', encoding='utf-8') as f:
                 json.dump(posts, f, indent=3, ensure_ascii=False)
-        
-        # Wait between requests (unless we're already rate limited above)
-        if idx < len(posts_to_analyze) - 1:  # Don't wait after the last post
-            time.sleep(MIN_DELAY_BETWEEN_REQUESTS)
     
     print(f"\n✓ All analyses complete! Results saved to {output_file}")
 
@@ -0,0 +1,28 @@
+// Shared by /api/vote and /api/leaderboard. The leading underscore keeps Vercel from
+// exposing this module as its own route.
+
+export const LEADERBOARD_KEY = 'hw_arena:leaderboard';
+
+// How long /api/leaderboard reuses its per-instance snapshot. The load test waits this out.
+export const SNAPSHOT_TTL_MS = 5000;
+
+// Stored as a Redis hash: field "<model>:w|l|t" => integer string.
+// Accepts either an hgetall object or the flat [field, value, ...] array a Lua HGETALL returns.
+export function parseLeaderboard(raw) {
+  const entries = Array.isArray(raw)
+    ? Array.from({ length: Math.floor(raw.length / 2) }, (_, i) => [raw[2 * i], raw[2 * i + 1]])
+    : Object.entries(raw || {});
+
+  const models = {};
+  for (const [field, val] of entries) {
+    // Model names may contain ':'; the metric is always the last segment.
+    const sep = String(field).lastIndexOf(':');
+    if (sep <= 0) continue;
+    const model = field.slice(0, sep);
+    const metric = field.slice(sep + 1);
+    if (metric !== 'w' && metric !== 'l' && metric !== 't') continue;
+    if (!models[model]) models[model] = { w: 0, l: 0, t: 0 };
+    models[model][metric] = Number(val || 0);
+  }
+  return models;
+}
@@ -1,35 +1,72 @@
+import { createHash } from 'node:crypto';
 import { Redis } from '@upstash/redis';
+import { LEADERBOARD_KEY, SNAPSHOT_TTL_MS, parseLeaderboard } from './_leaderboard.js';
 
 const redis = Redis.fromEnv();
 
+// Parsed leaderboard is kept per function instance for a few seconds, so bursts of page
+// views cost one hgetall instead of one each. Clients revalidate with If-None-Match.
+// Voters get fresh counts straight from /api/vote, so they never wait on this TTL.
+
+let snapshot = null; // { models, etag, updatedAt, expiresAt }
+let inflight = null;
+
 function withCors(res) {
   res.setHeader('access-control-allow-origin', '*');
   res.setHeader('access-control-allow-methods', 'GET,POST,OPTIONS');
-  res.setHeader('access-control-allow-headers', 'content-type');
+  res.setHeader('access-control-allow-headers', 'content-type, if-none-match');
+  res.setHeader('access-control-expose-headers', 'etag');
   return res;
 }
 
+async function loadSnapshot() {
+  // Overall leaderboard only (no HW breakdown).
+  const models = parseLeaderboard(await redis.hgetall(LEADERBOARD_KEY));
+
+  const digest = createHash('sha1')
+    .update(JSON.stringify(Object.keys(models).sort().map((m) => [m, models[m]])))
+    .digest('base64url');
+  const now = Date.now();
+  // Weak validator: it covers the leaderboard counts only. updatedAt is the snapshot time and
+  // differs between instances, so two bodies with the same ETag are equivalent, not identical.
+  const etag = `W/"${digest}"`;
+  return { models, etag, updatedAt: now, expiresAt: now + SNAPSHOT_TTL_MS };
+}
+
+// Weak comparison (RFC 9110 §13.1.2): ignore W/ prefixes; the header may list several tags or be '*'.
+function matchesIfNoneMatch(header, etag) {
+  if (!header) return false;
+  const opaque = (tag) => tag.trim().replace(/^W\//, '');
+  const target = opaque(etag);
+  return header.split(',').some((tag) => tag.trim() === '*' || opaque(tag) === target);
+}
+
+async function getSnapshot() {
+  if (snapshot && snapshot.expiresAt > Date.now()) return snapshot;
+  // Coalesce concurrent misses into a single Redis read.
+  if (!inflight) {
+    inflight = loadSnapshot()
+      .then((next) => {
+        snapshot = next;
+        return next;
+      })
+      .finally(() => {
+        inflight = null;
+      });
+  }
+  return inflight;
+}
+
 export default async function handler(req, res) {
   withCors(res);
   if (req.method === 'OPTIONS') return res.status(204).end();
   if (req.method !== 'GET') return res.status(405).json({ ok: false, error: 'Method not allowed' });
 
-  // Overall leaderboard only (no HW breakdown).
-  // Stored as a Redis hash: field "<model>:w|l|t" => integer string.
-  const raw = (await redis.hgetall('hw_arena:leaderboard')) || {};
-
-  const models = {};
-  for (const [field, val] of Object.entries(raw)) {
-    const [model, metric] = field.split(':');
-    if (!model || !metric) continue;
-    if (!models[model]) models[model] = { w: 0, l: 0, t: 0 };
-    const n = Number(val || 0);
-    if (metric === 'w') models[model].w = n;
-    if (metric === 'l') models[model].l = n;
-    if (metric === 't') models[model].t = n;
-  }
-
-  return res.status(200).json({ ok: true, models, updatedAt: Date.now() });
-}
+  const { models, etag, updatedAt } = await getSnapshot();
 
+  res.setHeader('etag', etag);
+  res.setHeader('cache-control', 'public, max-age=0, must-revalidate');
+  if (matchesIfNoneMatch(req.headers?.['if-none-match'], etag)) return res.status(304).end();
 
+  return res.status(200).json({ ok: true, models, updatedAt });
+}
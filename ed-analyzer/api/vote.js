@@ -1,7 +1,26 @@
 import { Redis } from '@upstash/redis';
+import { LEADERBOARD_KEY, parseLeaderboard } from './_leaderboard.js';
 
 const redis = Redis.fromEnv();
 
+const VOTE_TTL_SECONDS = 60 * 60 * 24 * 365;
+
+// Dedup + tally in one round trip. Runs atomically on the Redis side, so two concurrent
+// duplicate votes cannot both pass the SET NX check. Returns {recorded (0|1), HGETALL leaderboard}
+// so the voter sees their vote without going through /api/leaderboard's cached snapshot.
+// KEYS[1] = vote dedup key, KEYS[2] = leaderboard hash
+// ARGV[1] = dedup TTL (seconds), ARGV[2..] = field, delta, field, delta, ...
+const RECORD_VOTE_SCRIPT = `
+local recorded = 0
+if redis.call('SET', KEYS[1], '1', 'NX', 'EX', ARGV[1]) then
+  recorded = 1
+  for i = 2, #ARGV, 2 do
+    redis.call('HINCRBY', KEYS[2], ARGV[i], tonumber(ARGV[i + 1]))
+  end
+end
+return { recorded, redis.call('HGETALL', KEYS[2]) }
+`;
+
 function withCors(res) {
   res.setHeader('access-control-allow-origin', '*');
   res.setHeader('access-control-allow-methods', 'GET,POST,OPTIONS');
@@ -38,13 +57,9 @@ export default async function handler(req, res) {
   // Light anti-abuse: one vote per (hw, pair, clientId) for 1 year.
   // (Even though aggregation is overall, we keep hw in the dedup key so users can vote per-HW matchup.)
   const voteKey = `hw_arena:vote:${String(hw ?? 'unknown')}:${canonicalPairKey(modelA, modelB)}:${clientId}`;
-  const existing = await redis.get(voteKey);
-  if (existing) return res.status(200).json({ ok: true, duplicate: true });
-  await redis.set(voteKey, '1', { ex: 60 * 60 * 24 * 365 });
 
-  const ops = [];
-  const inc = (model, metric, delta) =>
-    ops.push(redis.hincrby('hw_arena:leaderboard', `${model}:${metric}`, delta));
+  const incs = [];
+  const inc = (model, metric, delta) => incs.push(`${model}:${metric}`, delta);
 
   if (winner === 'A') {
     inc(modelA, 'w', 1);
@@ -57,8 +72,12 @@ export default async function handler(req, res) {
     inc(modelB, 't', 1);
   }
 
-  await Promise.all(ops);
-  return res.status(200).json({ ok: true });
+  const [recorded, raw] = await redis.eval(
+    RECORD_VOTE_SCRIPT,
+    [voteKey, LEADERBOARD_KEY],
+    [VOTE_TTL_SECONDS, ...incs]
+  );
+  const models = parseLeaderboard(raw);
+  if (Number(recorded) !== 1) return res.status(200).json({ ok: true, duplicate: true, models });
+  return res.status(200).json({ ok: true, models });
 }
-
-
@@ -0,0 +1,119 @@
+// Load test for the HW Arena API handlers against a local Redis-compatible stand-in.
+//
+// The handlers use Redis.fromEnv(), so point them at a local Upstash-compatible REST proxy:
+//   docker run -d -p 6379:6379 redis
+//   docker run -d -p 8079:80 -e SRH_MODE=env -e SRH_TOKEN=local -e SRH_CONNECTION_STRING=redis://host.docker.internal:6379 hiett/serverless-redis-http
+//   UPSTASH_REDIS_REST_URL=http://localhost:8079 UPSTASH_REDIS_REST_TOKEN=local npm run loadtest:arena
+//
+// Writes to the hw_arena:* keys of whatever Redis it is pointed at and removes its own models and
+// hw_arena:vote:loadtest:* keys afterwards — still, never run against production.
+import { Redis } from '@upstash/redis';
+import voteHandler from '../api/vote.js';
+import leaderboardHandler from '../api/leaderboard.js';
+import { LEADERBOARD_KEY, SNAPSHOT_TTL_MS } from '../api/_leaderboard.js';
+
+const redis = Redis.fromEnv();
+
+const VOTERS = Number(process.env.ARENA_LOADTEST_VOTERS || 200);
+const DUPLICATES = Number(process.env.ARENA_LOADTEST_DUPLICATES || 5);
+const READS = Number(process.env.ARENA_LOADTEST_READS || 1000);
+
+const MODEL_A = `loadtest-a-${Date.now()}`;
+const MODEL_B = `loadtest-b-${Date.now()}`;
+
+// Minimal stand-in for the Vercel/Node response object used by the handlers.
+function call(handler, req) {
+  return new Promise((resolve, reject) => {
+    const headers = {};
+    let statusCode = 200;
+    const res = {
+      setHeader: (k, v) => {
+        headers[k.toLowerCase()] = v;
+      },
+      status: (code) => {
+        statusCode = code;
+        return res;
+      },
+      json: (body) => resolve({ status: statusCode, headers, body }),
+      end: () => resolve({ status: statusCode, headers, body: null }),
+    };
+    Promise.resolve(handler({ headers: {}, ...req }, res)).catch(reject);
+  });
+}
+
+function summarize(label, durations) {
+  const sorted = durations.slice().sort((a, b) => a - b);
+  const pct = (p) => sorted[Math.min(sorted.length - 1, Math.floor((p / 100) * sorted.length))].toFixed(1);
+  console.log(`${label}: n=${sorted.length} p50=${pct(50)}ms p95=${pct(95)}ms p99=${pct(99)}ms`);
+}
+
+async function timed(fn) {
+  const start = performance.now();
+  const out = await fn();
+  return { out, ms: performance.now() - start };
+}
+
+async function cleanup() {
+  const fields = [MODEL_A, MODEL_B].flatMap((m) => ['w', 'l', 't'].map((metric) => `${m}:${metric}`));
+  await redis.hdel(LEADERBOARD_KEY, ...fields);
+
+  // Also sweeps dedup keys left behind by earlier runs that were killed before cleaning up.
+  let cursor = '0';
+  do {
+    const [next, keys] = await redis.scan(cursor, { match: 'hw_arena:vote:loadtest:*', count: 500 });
+    if (keys.length) await redis.del(...keys);
+    cursor = String(next);
+  } while (cursor !== '0');
+}
+
+async function run() {
+  // Every voter submits the same vote DUPLICATES times concurrently; exactly one must count.
+  const votes = [];
+  for (let i = 0; i < VOTERS; i++) {
+    const body = { hw: 'loadtest', modelA: MODEL_A, modelB: MODEL_B, winner: 'A', clientId: `c_loadtest_${i}` };
+    for (let d = 0; d < DUPLICATES; d++) {
+      votes.push(timed(() => call(voteHandler, { method: 'POST', body })));
+    }
+  }
+  const voteResults = await Promise.all(votes);
+  summarize('vote', voteResults.map((r) => r.ms));
+  const accepted = voteResults.filter((r) => r.out.status === 200 && !r.out.body?.duplicate).length;
+  console.log(`vote: accepted=${accepted} expected=${VOTERS}`);
+
+  // Let any warm snapshot expire so the reads see the votes above.
+  await new Promise((r) => setTimeout(r, SNAPSHOT_TTL_MS + 500));
+
+  const reads = [];
+  for (let i = 0; i < READS; i++) reads.push(timed(() => call(leaderboardHandler, { method: 'GET' })));
+  const readResults = await Promise.all(reads);
+  summarize('leaderboard', readResults.map((r) => r.ms));
+
+  const { body, headers } = readResults[0].out;
+  const wins = body?.models?.[MODEL_A]?.w ?? 0;
+  const losses = body?.models?.[MODEL_B]?.l ?? 0;
+  console.log(`leaderboard: ${MODEL_A}.w=${wins} ${MODEL_B}.l=${losses} expected=${VOTERS}`);
+
+  const revalidated = await call(leaderboardHandler, { method: 'GET', headers: { 'if-none-match': headers.etag } });
+  console.log(`leaderboard: conditional GET status=${revalidated.status} expected=304`);
+
+  return accepted === VOTERS && wins === VOTERS && losses === VOTERS && revalidated.status === 304;
+}
+
+async function main() {
+  let ok = false;
+  try {
+    ok = await run();
+  } finally {
+    await cleanup();
+  }
+  if (!ok) {
+    console.error('arena load test FAILED');
+    process.exit(1);
+  }
+  console.log('arena load test passed');
+}
+
+main().catch((e) => {
+  console.error(e);
+  process.exit(1);
+});
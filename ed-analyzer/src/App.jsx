@@ -716,7 +716,8 @@ export default function App() {
     const fetchRemoteLeaderboard = async (hw) => {
         if (!arenaApiEnabled) return null;
         const url = `${arenaApiBase}/api/leaderboard`;
-        const res = await fetch(url, {method: 'GET'});
+        // Always revalidate: the API answers 304 via ETag when the snapshot is unchanged.
+        const res = await fetch(url, {method: 'GET', cache: 'no-cache'});
         if (!res.ok) throw new Error(`Leaderboard fetch failed (${res.status})`);
         const data = await res.json();
         // Normalize shape (support both {models} and {ok, models}).
@@ -843,8 +844,10 @@ export default function App() {
                 const text = await res.text();
                 throw new Error(`Vote failed (${res.status}): ${text || 'unknown error'}`);
             }
-            const data = await fetchRemoteLeaderboard('All');
-            setArenaRemoteLeaderboard(data);
+            // The vote response carries the post-vote leaderboard; the GET endpoint may serve a
+            // snapshot from before this vote.
+            const data = await res.json();
+            setArenaRemoteLeaderboard(data?.models ? data : await fetchRemoteLeaderboard('All'));
         } catch (e) {
             setArenaError(e?.message || 'Failed to submit vote.');
         } finally {